@@ -1 +1 @@
-__version__ = "0.3.6"
+__version__ = "0.4.25"
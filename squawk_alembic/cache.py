@@ -0,0 +1,109 @@
+"""Persistent on-disk cache shared across hook runs, backed by SQLite."""
+
+import contextlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from squawk_alembic import __version__
+
+DISABLE_ENV_VAR = "SQUAWK_ALEMBIC_NO_CACHE"
+
+# Other versions' cache files that nothing has written to for this long are deleted.
+STALE_AFTER_SECONDS = 30 * 24 * 60 * 60
+
+# Cache directories already swept of stale files in this process.
+_swept: set[Path] = set()
+
+
+def cache_path() -> Path:
+    """Return this hook version's cache database path, honoring XDG_CACHE_HOME.
+
+    Each version gets its own file: entries written by another version may have
+    a different shape, and repos pinning different hook versions then don't
+    evict each other's entries.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "squawk-alembic" / f"cache-{__version__}.sqlite"
+
+
+def _connect() -> sqlite3.Connection | None:
+    """Open the cache database, or return None if caching is disabled or unavailable."""
+    if os.environ.get(DISABLE_ENV_VAR):
+        return None
+    try:
+        path = cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5)
+    except (RuntimeError, OSError, sqlite3.Error):
+        # RuntimeError: HOME is unset and the home directory can't be determined.
+        return None
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+    except sqlite3.Error:
+        conn.close()
+        return None
+    return conn
+
+
+def cache_get(key: str) -> Any | None:
+    """Return the JSON value stored under key, or None on a miss."""
+    conn = _connect()
+    if conn is None:
+        return None
+    with closing(conn):
+        try:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                return json.loads(row[0])
+            except ValueError:
+                # A truncated or hand-edited entry; drop it so it gets rewritten.
+                with conn:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+        except sqlite3.Error:
+            return None
+
+
+def cache_set(key: str, value: Any) -> None:
+    """Store a JSON-serializable value under key. Failures are ignored."""
+    conn = _connect()
+    if conn is None:
+        return
+    with closing(conn):
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value)),
+                )
+        except sqlite3.Error:
+            return
+    _remove_stale_files(cache_path())
+
+
+def _remove_stale_files(path: Path) -> None:
+    # Other versions never read this file, nor this version theirs. Delete their
+    # files once nothing has written to them for a while, on the first write of
+    # each process, so versions still in use elsewhere keep a warm cache.
+    directory = path.parent
+    if directory in _swept:
+        return
+    _swept.add(directory)
+    cutoff = time.time() - STALE_AFTER_SECONDS
+    for other in directory.glob("cache*.sqlite"):
+        if other == path:
+            continue
+        with contextlib.suppress(OSError):
+            if other.stat().st_mtime < cutoff:
+                other.unlink()
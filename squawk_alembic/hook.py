@@ -2,33 +2,83 @@
 
 import argparse
 import ast
+import contextlib
+import hashlib
 import os
 import re
+import shutil
 import subprocess
 import sys
 import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser, NoOptionError, NoSectionError
 from dataclasses import dataclass
+from functools import lru_cache, partial
+from importlib import metadata
 from pathlib import Path
 
+from squawk_alembic.cache import cache_get, cache_set
+
+SQL_CACHE_ENV_VAR = "SQUAWK_ALEMBIC_CACHE_SQL"
 _BRANCH_RE = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._/\-]*$")
+_GIT_OBJECT_TYPES = frozenset({"blob", "tree", "commit", "tag"})
+_REVISION_ASSIGN_RE = re.compile(rb"^revision[ \t]*[:=]", re.M)
+_ALEMBIC_SECTION_RE = re.compile(r"^\[alembic\][ \t\r]*$(.*?)(?=^\[|\Z)", re.M | re.S)
+_RUNNING_UPGRADE_RE = re.compile(r"^-- Running upgrade (\S*) -> (\S+)$", re.M)
+_TRAILING_COMMIT_RE = re.compile(r"^COMMIT;\s*\Z", re.M)
+_SCRIPT_LOCATION_RE = re.compile(r"^script_location[ \t]*=[ \t]*(\S.*?)[ \t\r]*$", re.M)
 
 
-def find_migrations_path() -> Path | None:
-    """Auto-detect the alembic migrations versions directory from alembic.ini."""
-    config_path = Path("alembic.ini")
-    if not config_path.exists():
+def _script_location() -> str | None:
+    """Read script_location from alembic.ini, without any leading "./".
+
+    The parsed value is memoized per file path, modification time and size, so
+    repeated lookups within a process only cost a stat.
+    """
+    config_path = os.path.abspath("alembic.ini")
+    try:
+        stat = os.stat(config_path)
+    except OSError:
         return None
+    return _read_script_location(config_path, stat.st_mtime_ns, stat.st_size)
+
 
-    config = ConfigParser()
-    config.read(config_path)
+@lru_cache(maxsize=16)
+def _read_script_location(config_path: str, mtime_ns: int, size: int) -> str | None:
+    """Parse script_location out of an alembic.ini file.
 
+    The common `script_location = path` form under [alembic] is read with a regex;
+    anything else (":" delimiters, interpolation, odd casing) falls back to
+    ConfigParser. mtime_ns and size only serve as cache keys.
+    """
     try:
-        script_location = config.get("alembic", "script_location")
-    except (NoSectionError, NoOptionError):
+        text = Path(config_path).read_text()
+    except OSError:
+        return None
+
+    section = _ALEMBIC_SECTION_RE.search(text)
+    match = _SCRIPT_LOCATION_RE.search(section.group(1)) if section else None
+    if match and "%" not in match.group(1):
+        script_location = match.group(1)
+    else:
+        config = ConfigParser()
+        config.read_string(text, source=config_path)
+
+        try:
+            script_location = config.get("alembic", "script_location")
+        except (NoSectionError, NoOptionError):
+            return None
+
+    return script_location.removeprefix("./")
+
+
+def find_migrations_path() -> Path | None:
+    """Auto-detect the alembic migrations versions directory from alembic.ini."""
+    script_location = _script_location()
+    if script_location is None:
         return None
 
-    script_location = script_location.removeprefix("./")
     versions_path = Path(script_location) / "versions"
 
     if versions_path.is_dir():
@@ -45,12 +95,52 @@ class RevisionInfo:
 
 
 def extract_revision_info(filepath: str | Path) -> RevisionInfo | None:
-    """Parse a migration file to extract revision and down_revision from module-level assignments."""
-    with open(filepath) as f:
-        try:
-            tree = ast.parse(f.read())
-        except SyntaxError:
-            return None
+    """Parse a migration file to extract revision and down_revision from module-level assignments.
+
+    Results are cached on disk keyed by the file's content, so unchanged
+    migrations are not re-parsed on later runs.
+    """
+    source = Path(filepath).read_bytes()
+    return _cached_revision_info(source, hashlib.sha256(source).hexdigest())
+
+
+def _cached_revision_info(source: bytes, content_digest: str) -> RevisionInfo | None:
+    key = f"revision-info:{content_digest}"
+
+    cached = cache_get(key)
+    if cached is not None:
+        down_revision = cached["down_revision"]
+        if isinstance(down_revision, list):
+            down_revision = tuple(down_revision)
+        return RevisionInfo(
+            revision=cached["revision"],
+            down_revision=down_revision,
+            is_merge=cached["is_merge"],
+        )
+
+    info = _parse_revision_info(source)
+    if info is not None:
+        cache_set(
+            key,
+            {
+                "revision": info.revision,
+                "down_revision": info.down_revision,
+                "is_merge": info.is_merge,
+            },
+        )
+    return info
+
+
+def _parse_revision_info(source: bytes) -> RevisionInfo | None:
+    # Files without a module-level `revision` assignment (helpers, __init__.py)
+    # can't yield anything, so skip the much more expensive ast.parse.
+    if not _REVISION_ASSIGN_RE.search(source):
+        return None
+
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
 
     revision: str | None = None
     down_revision: str | tuple[str, ...] | None = None
@@ -97,26 +187,115 @@ class GenerateSqlError(Exception):
     """Raised when alembic upgrade --sql fails."""
 
 
-def generate_sql(filepath: str | Path) -> str | None:
-    """Run alembic upgrade --sql to generate the complete DDL for a migration.
+def _installed_version(distribution: str) -> str:
+    """Return the installed version of a distribution, or "" if it is missing."""
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return ""
 
-    Returns the SQL string, or None if the file should be skipped (merge migration,
-    unparseable revision). Raises GenerateSqlError if alembic fails.
+
+def _alembic_fingerprint(env: dict[str, str]) -> str | None:
+    """Hash the inputs besides the migration itself that shape alembic's output.
+
+    Covers the alembic executable, the installed alembic and SQLAlchemy versions,
+    the whole environment alembic runs with, alembic.ini (or ALEMBIC_CONFIG),
+    pyproject.toml and env.py. The executable is identified by its resolved path
+    and stat rather than by running `alembic --version`, which would cost as much
+    as a cache miss saves.
+
+    Code that migrations and env.py import is not covered, so SQL caching is
+    opt-in: returns None, which disables it, unless SQUAWK_ALEMBIC_CACHE_SQL is
+    set in env, and also when alembic is not on PATH.
     """
-    info = extract_revision_info(filepath)
-    if info is None:
+    if not env.get(SQL_CACHE_ENV_VAR):
         return None
-
-    if info.is_merge:
+    executable = shutil.which("alembic", path=env.get("PATH"))
+    if executable is None:
         return None
+    stat = os.stat(executable)
 
-    base = info.down_revision if isinstance(info.down_revision, str) else "base"
-    target = f"{base}:{info.revision}"
-
+    digest = hashlib.sha256()
+    digest.update(
+        f"{os.path.realpath(executable)}\0{stat.st_mtime_ns}\0{stat.st_size}\0".encode()
+    )
+    for distribution in ("alembic", "SQLAlchemy"):
+        digest.update(f"{_installed_version(distribution)}\0".encode())
+    for name, value in sorted(env.items()):
+        digest.update(f"{name}={value}\0".encode())
+    config_paths = [Path("alembic.ini"), Path("pyproject.toml")]
+    if env.get("ALEMBIC_CONFIG"):
+        config_paths.append(Path(env["ALEMBIC_CONFIG"]))
+    script_location = _script_location()
+    if script_location is not None:
+        config_paths.append(Path(script_location) / "env.py")
+    for path in config_paths:
+        with contextlib.suppress(OSError):
+            digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def alembic_env() -> dict[str, str]:
+    """Build the environment for alembic, with a dummy DATABASE_URL if unset."""
     env = os.environ.copy()
     if "DATABASE_URL" not in env:
         env["DATABASE_URL"] = "postgresql://localhost/lint"
+    return env
+
+
+def _base_revision(info: RevisionInfo) -> str:
+    """Return the revision alembic upgrades from to run just this migration."""
+    return info.down_revision if isinstance(info.down_revision, str) else "base"
+
+
+@dataclass(frozen=True, slots=True)
+class _SqlJob:
+    """A migration whose SQL is not cached and has to be generated by alembic."""
+
+    filepath: str | Path
+    info: RevisionInfo
+    cache_key: str | None
+
+    @property
+    def base(self) -> str:
+        return _base_revision(self.info)
+
+
+def _prepare_sql(
+    filepath: str | Path, fingerprint: str | None
+) -> tuple[str | None, _SqlJob | None]:
+    """Look up a migration's SQL in the cache.
 
+    Returns (sql, None) on a cache hit, (None, job) when alembic has to run, and
+    (None, None) when the file should be skipped (merge migration, unparseable
+    revision). fingerprint comes from _alembic_fingerprint; None disables caching.
+    """
+    # Read and hash the file once; both caches below are keyed by its content.
+    source = Path(filepath).read_bytes()
+    content_digest = hashlib.sha256(source).hexdigest()
+
+    info = _cached_revision_info(source, content_digest)
+    if info is None or info.is_merge:
+        return None, None
+
+    key = None
+    if fingerprint is not None:
+        base = _base_revision(info)
+        key = f"alembic-sql:{fingerprint}:{content_digest}:{base}:{info.revision}"
+        cached = cache_get(key)
+        if cached is not None:
+            return cached, None
+
+    return None, _SqlJob(filepath=filepath, info=info, cache_key=key)
+
+
+def _alembic_upgrade_sql(target: str, env: dict[str, str], filepath: str | Path) -> str:
+    """Run alembic upgrade --sql over target and return its output.
+
+    Raises GenerateSqlError, naming filepath, if alembic is missing, can't be
+    started or fails.
+    """
     try:
         result = subprocess.run(
             ["alembic", "upgrade", target, "--sql"],
@@ -128,37 +307,224 @@ def generate_sql(filepath: str | Path) -> str | None:
         raise GenerateSqlError(
             "squawk-alembic: alembic not found. Ensure alembic is installed in your environment."
         ) from exc
+    except OSError as exc:
+        raise GenerateSqlError(f"squawk-alembic: cannot run alembic: {exc}") from exc
 
     if result.returncode != 0:
         raise GenerateSqlError(
             f"squawk-alembic: alembic upgrade --sql failed for {filepath}:\n{result.stderr}"
         )
-
     return result.stdout
 
 
-def validate_branch(branch: str) -> bool:
-    """Validate that a branch name is safe and exists in git.
+def _run_sql_job(job: _SqlJob, env: dict[str, str]) -> str:
+    """Generate and cache the SQL for a single migration."""
+    sql = _alembic_upgrade_sql(f"{job.base}:{job.info.revision}", env, job.filepath)
+    if job.cache_key is not None:
+        cache_set(job.cache_key, sql)
+    return sql
+
+
+def generate_sql(filepath: str | Path, env: dict[str, str] | None = None) -> str | None:
+    """Run alembic upgrade --sql to generate the complete DDL for a migration.
+
+    Returns the SQL string, or None if the file should be skipped (merge migration,
+    unparseable revision). Raises GenerateSqlError if alembic fails. Pass env (see
+    alembic_env) to reuse one environment across many calls instead of copying
+    os.environ for each.
+
+    With SQUAWK_ALEMBIC_CACHE_SQL set, output is cached on disk keyed by the
+    migration's content, the revision range and the alembic environment, so
+    unchanged migrations skip alembic entirely.
+    """
+    if env is None:
+        env = alembic_env()
+
+    sql, job = _prepare_sql(filepath, _alembic_fingerprint(env))
+    if job is None:
+        return sql
+    return _run_sql_job(job, env)
+
+
+def _sql_chains(jobs: list[_SqlJob]) -> list[list[int]]:
+    """Group jobs, by index, into linear chains of consecutive revisions.
+
+    A job joins its parent's chain when the parent is also a job and it is the
+    parent's only child among the jobs, so `alembic upgrade first:last` over the
+    chain runs exactly those migrations. Migrations starting from base are never
+    chained, since alembic prefixes their SQL with the version table DDL.
+    """
+    revision_counts = Counter(job.info.revision for job in jobs)
+    child_counts = Counter(job.info.down_revision for job in jobs)
+    # Only migrations with a parent revision and an unambiguous id are chainable.
+    by_revision: dict[str, int] = {}
+    down_revisions: dict[int, str] = {}
+    for index, job in enumerate(jobs):
+        down_revision = job.info.down_revision
+        if isinstance(down_revision, str) and revision_counts[job.info.revision] == 1:
+            by_revision[job.info.revision] = index
+            down_revisions[index] = down_revision
+
+    child_of: dict[int, int] = {}
+    for index, down_revision in down_revisions.items():
+        parent = by_revision.get(down_revision)
+        if parent is not None and child_counts[down_revision] == 1:
+            child_of[parent] = index
+    chained = set(child_of.values())
+
+    chains: list[list[int]] = []
+    assigned: set[int] = set()
+    for index in range(len(jobs)):
+        if index in chained:
+            continue
+        chain = [index]
+        while chain[-1] in child_of:
+            chain.append(child_of[chain[-1]])
+        chains.append(chain)
+        assigned.update(chain)
+    # Anything left over forms a cycle, which alembic will reject on its own.
+    chains.extend([index] for index in range(len(jobs)) if index not in assigned)
+    return chains
+
+
+def _split_upgrade_sql(sql: str, chain: list[_SqlJob]) -> list[str] | None:
+    """Split one alembic run over a chain into the SQL of each migration.
+
+    Every piece is shaped as if alembic had been run over that migration alone:
+    the framing before the first "-- Running upgrade" marker (BEGIN;) is repeated
+    for each piece and the closing COMMIT; appended to it. Returns None when the
+    markers don't match the chain's revisions exactly.
+    """
+    markers = list(_RUNNING_UPGRADE_RE.finditer(sql))
+    expected = [(job.info.down_revision, job.info.revision) for job in chain]
+    if [marker.groups() for marker in markers] != expected:
+        return None
+
+    head = sql[: markers[0].start()]
+    bounds = [marker.start() for marker in markers] + [len(sql)]
+    chunks = [sql[start:end] for start, end in zip(bounds, bounds[1:], strict=False)]
+    commit = _TRAILING_COMMIT_RE.search(chunks[-1])
+    trailer = commit.group() if commit else ""
+
+    pieces = []
+    for chunk in chunks[:-1]:
+        if head and chunk.endswith(head):
+            # With transaction_per_migration each step already commits and the
+            # next one reopens the transaction.
+            pieces.append(head + chunk[: -len(head)])
+        else:
+            pieces.append(head + chunk + trailer)
+    pieces.append(head + chunks[-1])
+    return pieces
+
+
+def _run_sql_chain(
+    chain: list[_SqlJob], env: dict[str, str]
+) -> list[tuple[str | None, str | None]]:
+    """Generate the SQL for a chain of consecutive migrations.
+
+    A chain of several migrations is generated by a single alembic run and split
+    per migration. If that run fails or its output can't be split, each
+    migration is run on its own so errors point at the right file. Returns
+    (sql, error) per job, like main reports them. Safe to call from worker
+    threads.
+    """
+    if len(chain) > 1:
+        target = f"{chain[0].base}:{chain[-1].info.revision}"
+        pieces = None
+        with contextlib.suppress(GenerateSqlError):
+            pieces = _split_upgrade_sql(
+                _alembic_upgrade_sql(target, env, chain[-1].filepath), chain
+            )
+        if pieces is not None:
+            for job, piece in zip(chain, pieces, strict=True):
+                if job.cache_key is not None:
+                    cache_set(job.cache_key, piece)
+            return [(piece or None, None) for piece in pieces]
+
+    results: list[tuple[str | None, str | None]] = []
+    for job in chain:
+        try:
+            results.append((_run_sql_job(job, env) or None, None))
+        except GenerateSqlError as exc:
+            results.append((None, str(exc)))
+    return results
+
+
+def _generate_all_sql(
+    filepaths: list[str], env: dict[str, str]
+) -> list[tuple[str | None, str | None]]:
+    """Generate the SQL for every migration file, in input order.
+
+    Returns (sql, error) per file: sql is None when there is nothing to lint,
+    error is the message to report when generation failed. Cache hits are served
+    directly; the rest are grouped into chains of consecutive revisions so that
+    each chain costs one alembic run, and independent chains run concurrently.
+    """
+    fingerprint = _alembic_fingerprint(env)
+    results: list[tuple[str | None, str | None]] = [(None, None)] * len(filepaths)
+    jobs: list[_SqlJob] = []
+    job_indexes: list[int] = []
+
+    for index, filepath in enumerate(filepaths):
+        try:
+            sql, job = _prepare_sql(filepath, fingerprint)
+        except OSError as exc:
+            results[index] = (
+                None,
+                f"squawk-alembic: cannot read migration file: {exc}",
+            )
+            continue
+        if job is None:
+            results[index] = (sql or None, None)
+        else:
+            jobs.append(job)
+            job_indexes.append(index)
+
+    if not jobs:
+        return results
+
+    # Each alembic run is an independent subprocess, so threads are enough to
+    # overlap them.
+    chains = _sql_chains(jobs)
+    max_workers = min(len(chains), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chain_results = executor.map(
+            partial(_run_sql_chain, env=env),
+            [[jobs[index] for index in chain] for chain in chains],
+        )
+        for chain, chain_result in zip(chains, chain_results, strict=True):
+            for index, result in zip(chain, chain_result, strict=True):
+                results[job_indexes[index]] = result
+    return results
+
+
+def resolve_branch(branch: str) -> str | None:
+    """Validate that a branch name is safe and exists in git, and resolve it.
 
-    For remote refs (origin/...), attempts a shallow fetch when the ref is
-    missing locally, common in CI shallow clones.
+    Returns the commit SHA the branch points to, so later lookups don't resolve
+    the ref again, or None (after printing why) if the branch is unusable. For
+    remote refs (origin/...), attempts a shallow fetch when the ref is missing
+    locally, common in CI shallow clones; the branch name itself is returned then.
     """
     if not _BRANCH_RE.match(branch) or ".." in branch:
         print(
             f"squawk-alembic: invalid branch name: {branch!r}",
             file=sys.stderr,
         )
-        return False
+        return None
     try:
         result = subprocess.run(
-            ["git", "rev-parse", "--verify", branch],
+            # ^{commit} peels annotated tags to the commit they point to.
+            ["git", "rev-parse", "--verify", f"{branch}^{{commit}}"],
             capture_output=True,
+            text=True,
         )
     except FileNotFoundError:
         print("squawk-alembic: git not found", file=sys.stderr)
-        return False
+        return None
     if result.returncode == 0:
-        return True
+        return result.stdout.strip() or branch
 
     if branch.startswith("origin/"):
         remote_branch = branch.removeprefix("origin/")
@@ -167,90 +533,108 @@ def validate_branch(branch: str) -> bool:
             capture_output=True,
         )
         if fetch.returncode == 0:
-            return True
+            return branch
 
     print(
         f"squawk-alembic: branch '{branch}' not found in git",
         file=sys.stderr,
     )
-    return False
+    return None
+
 
+def files_existing_on_branch(filepaths: list[str], branch: str) -> set[str]:
+    """Return the subset of filepaths that exist on the given git branch or commit.
 
-def file_exists_on_branch(filepath: str, branch: str) -> bool:
-    """Check if a file exists on the given git branch."""
+    All paths are checked by a single `git cat-file --batch-check` process
+    instead of one `git cat-file -e` per file.
+    """
+    if not filepaths:
+        return set()
     try:
         result = subprocess.run(
-            ["git", "cat-file", "-e", f"{branch}:{filepath}"],
+            ["git", "cat-file", "--batch-check=%(objecttype)"],
+            input="".join(f"{branch}:{filepath}\n" for filepath in filepaths),
             capture_output=True,
+            text=True,
         )
     except FileNotFoundError:
-        return False
-    return result.returncode == 0
+        return set()
+    if result.returncode != 0:
+        return set()
+
+    # One output line per input line: the object type, or "<object> missing".
+    return {
+        filepath
+        for filepath, line in zip(filepaths, result.stdout.splitlines(), strict=False)
+        if line in _GIT_OBJECT_TYPES
+    }
 
 
 class _SquawkNotFound(Exception):
     pass
 
 
-def _lint_file(filepath: str, migrations_path: Path, diff_branch: str | None) -> int:
-    """Lint a single migration file. Returns 0 on success/skip, 1 on failure.
+def _squawk(
+    args: list[str], sql: str | None = None
+) -> subprocess.CompletedProcess[str]:
+    """Run squawk, feeding sql on stdin when given.
 
     Raises _SquawkNotFound if the squawk binary is missing.
     """
     try:
-        Path(filepath).relative_to(migrations_path)
-    except ValueError:
-        return 0
-
-    if diff_branch and file_exists_on_branch(filepath, diff_branch):
-        return 0
-
-    try:
-        sql = generate_sql(filepath)
-    except GenerateSqlError as exc:
-        print(str(exc), file=sys.stderr)
-        return 1
-    except OSError as exc:
-        print(
-            f"squawk-alembic: cannot read migration file: {exc}",
-            file=sys.stderr,
-        )
-        return 1
-
-    if not sql:
-        return 0
-
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".sql", delete=False) as tmp:
-        tmp.write(sql)
-        tmp_path = tmp.name
-
-    try:
-        result = subprocess.run(
-            ["squawk", tmp_path],
+        return subprocess.run(
+            ["squawk", *args],
+            input=sql,
             capture_output=True,
             text=True,
         )
-        if result.returncode != 0:
-            output = result.stdout.replace(tmp_path, filepath)
-            error = result.stderr.replace(tmp_path, filepath)
-            if output:
-                print(output)
-            if error:
-                print(error, file=sys.stderr)
-            return 1
     except FileNotFoundError:
         # Translate the low-level "squawk binary missing" OSError into our domain
         # error; the original FileNotFoundError is an implementation detail, so
         # suppress its chain with `from None`.
         raise _SquawkNotFound from None
-    finally:
-        Path(tmp_path).unlink(missing_ok=True)
 
-    return 0
 
+def _run_squawk(migrations: list[tuple[str, str]]) -> int:
+    """Lint the SQL of all migrations with a single squawk invocation.
 
-def main() -> int:
-    """CLI entrypoint. Returns 0 on success, 1 on any failure."""
+    A single migration is piped through stdin with --stdin-filepath, so squawk
+    reports it under the migration's path and no temporary file is needed. For
+    several migrations, each one's SQL is written to its own file in a temporary
+    directory so squawk reports violations per file; the temporary paths are then
+    rewritten back to the migration paths. Returns 0 on success, 1 on any
+    violation.
+
+    Raises _SquawkNotFound if the squawk binary is missing.
+    """
+    tmp_paths: dict[str, str] = {}
+    if len(migrations) == 1:
+        filepath, sql = migrations[0]
+        result = _squawk([f"--stdin-filepath={filepath}"], sql)
+    else:
+        with tempfile.TemporaryDirectory(prefix="squawk-alembic-") as tmp_dir:
+            for index, (filepath, sql) in enumerate(migrations):
+                tmp_path = os.path.join(tmp_dir, f"{index}.sql")
+                Path(tmp_path).write_text(sql)
+                tmp_paths[tmp_path] = filepath
+            result = _squawk(list(tmp_paths))
+
+    if result.returncode == 0:
+        return 0
+
+    output = result.stdout
+    error = result.stderr
+    for tmp_path, filepath in tmp_paths.items():
+        output = output.replace(tmp_path, filepath)
+        error = error.replace(tmp_path, filepath)
+    if output:
+        print(output)
+    if error:
+        print(error, file=sys.stderr)
+    return 1
+
+
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--diff-branch",
@@ -258,13 +642,25 @@ def main() -> int:
         help="Only lint migration files that don't exist on this branch.",
     )
     parser.add_argument("files", nargs="*")
-    args = parser.parse_args()
+    return parser
+
+
+# Built once at import; parse_args keeps no state between calls.
+_PARSER = _build_parser()
+
+
+def main() -> int:
+    """CLI entrypoint. Returns 0 on success, 1 on any failure."""
+    args = _PARSER.parse_args()
 
     if not args.files:
         return 0
 
-    if args.diff_branch and not validate_branch(args.diff_branch):
-        return 1
+    diff_commit = None
+    if args.diff_branch:
+        diff_commit = resolve_branch(args.diff_branch)
+        if diff_commit is None:
+            return 1
 
     migrations_path = find_migrations_path()
     if not migrations_path:
@@ -274,19 +670,45 @@ def main() -> int:
         )
         return 1
 
+    # A plain string-prefix test on absolute paths; pre-commit can pass many
+    # non-migration files, and Path.relative_to raising per miss adds up.
+    migrations_prefix = os.path.join(os.path.abspath(migrations_path), "")
+    filepaths = [
+        filepath
+        for filepath in args.files
+        if os.path.abspath(filepath).startswith(migrations_prefix)
+    ]
+    if diff_commit is not None:
+        existing = files_existing_on_branch(filepaths, diff_commit)
+        filepaths = [filepath for filepath in filepaths if filepath not in existing]
+    if not filepaths:
+        return 0
+
+    # Results come back in input order for stable output.
+    results = _generate_all_sql(filepaths, alembic_env())
+
     exit_code = 0
+    migrations: list[tuple[str, str]] = []
 
-    for filepath in args.files:
-        try:
-            result = _lint_file(filepath, migrations_path, args.diff_branch)
-        except _SquawkNotFound:
-            print(
-                "squawk-alembic: squawk not found. Install with: pip install squawk-cli",
-                file=sys.stderr,
-            )
-            return 1
-        if result != 0:
+    for filepath, (sql, error) in zip(filepaths, results, strict=True):
+        if error is not None:
+            print(error, file=sys.stderr)
+            exit_code = 1
+        if sql is not None:
+            migrations.append((filepath, sql))
+
+    if not migrations:
+        return exit_code
+
+    try:
+        if _run_squawk(migrations) != 0:
             exit_code = 1
+    except _SquawkNotFound:
+        print(
+            "squawk-alembic: squawk not found. Install with: pip install squawk-cli",
+            file=sys.stderr,
+        )
+        return 1
 
     return exit_code
 
@@ -1,31 +1,93 @@
 """Shared test fixtures."""
 
+import shutil
+import subprocess
 import textwrap
-from types import SimpleNamespace
+from collections import namedtuple
+from functools import lru_cache
 
 from pytest import fixture
 
+# Test sources are literals, so each distinct one only needs dedenting once.
+_dedent = lru_cache(maxsize=None)(textwrap.dedent)
 
-@fixture()
-def repo(tmp_path, monkeypatch):
+
+@fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep the persistent cache out of the real user cache directory."""
+    cache_home = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    monkeypatch.delenv("SQUAWK_ALEMBIC_NO_CACHE", raising=False)
+    return cache_home
+
+
+class _MigrationWriter:
+    """Write migration sources to files, reusing the file for a repeated source."""
+
+    __slots__ = ("_dir", "_paths")
+
+    def __init__(self, directory):
+        self._dir = directory
+        self._paths: dict[str, str] = {}
+
+    def __call__(self, source):
+        text = _dedent(source)
+        path = self._paths.get(text)
+        if path is None:
+            file = self._dir / f"m_{len(self._paths):04d}.py"
+            file.write_text(text)
+            path = self._paths[text] = str(file)
+        return path
+
+
+@fixture(scope="session")
+def migration_file(tmp_path_factory):
+    """Write a migration file and return its path.
+
+    Identical sources are written once per session and shared between tests.
+    """
+    return _MigrationWriter(tmp_path_factory.mktemp("migrations"))
+
+
+@fixture
+def empty_repo(tmp_path, monkeypatch):
+    """Chdir into an empty directory, for tests that build their own layout."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@fixture(scope="session")
+def _repo_template(tmp_path_factory):
+    """Build the fake repo layout once; each test gets a copy."""
+    template = tmp_path_factory.mktemp("repo-template")
+    (template / "migrations" / "versions").mkdir(parents=True)
+    (template / "alembic.ini").write_text("[alembic]\nscript_location = ./migrations\n")
+    return template
+
+
+@fixture
+def repo(_repo_template, tmp_path, monkeypatch):
     """Set up a fake repo with alembic config and a versions directory."""
+    shutil.copytree(_repo_template, tmp_path, dirs_exist_ok=True)
     monkeypatch.chdir(tmp_path)
-    versions = tmp_path / "migrations" / "versions"
-    versions.mkdir(parents=True)
-    (tmp_path / "alembic.ini").write_text("[alembic]\nscript_location = ./migrations\n")
     return tmp_path
 
 
-def make_result(returncode=0, stdout="", stderr=""):
-    return SimpleNamespace(returncode=returncode, stdout=stdout, stderr=stderr)
+# Stands in for subprocess.CompletedProcess, with just the fields the hook reads.
+make_result = namedtuple(
+    "Result", ["returncode", "stdout", "stderr"], defaults=(0, "", "")
+)
 
 
 def write_migration(repo, filename, source):
     path = repo / "migrations" / "versions" / filename
-    path.write_text(textwrap.dedent(source))
+    path.write_text(_dedent(source))
     return f"migrations/versions/{filename}"
 
 
+BRANCH_SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
 def fake_subprocess(
     alembic_result=None,
     squawk_result=None,
@@ -37,19 +99,73 @@ def fake_subprocess(
     alembic_res = alembic_result or make_result(stdout="CREATE TABLE foo (id int);\n")
     squawk_res = squawk_result or make_result()
 
+    rev_parse_res = (
+        make_result(stdout=f"{BRANCH_SHA}\n")
+        if git_branch_valid
+        else make_result(returncode=1)
+    )
+    fetch_res = make_result(returncode=0 if git_fetch_succeeds else 1)
+
+    def cat_file(kwargs):
+        objects = kwargs["input"].splitlines()
+        if git_exists_on_branch:
+            return make_result(stdout="blob\n" * len(objects))
+        return make_result(stdout="".join(f"{o} missing\n" for o in objects))
+
+    git_handlers = {
+        "rev-parse": lambda kwargs: rev_parse_res,
+        "fetch": lambda kwargs: fetch_res,
+        "cat-file": cat_file,
+    }
+
+    def git(cmd, kwargs):
+        handler = git_handlers.get(cmd[1])
+        return handler(kwargs) if handler else make_result(returncode=1)
+
+    handlers = {
+        "git": git,
+        "alembic": lambda cmd, kwargs: alembic_res,
+        "squawk": lambda cmd, kwargs: squawk_res,
+    }
+
     def side_effect(cmd, **kwargs):
-        if cmd[0] == "git":
-            if "rev-parse" in cmd:
-                return make_result(returncode=0 if git_branch_valid else 1)
-            if "fetch" in cmd:
-                return make_result(returncode=0 if git_fetch_succeeds else 1)
-            if "cat-file" in cmd:
-                return make_result(returncode=0 if git_exists_on_branch else 1)
-            return make_result(returncode=1)
-        if cmd[0] == "alembic":
-            return alembic_res
-        if cmd[0] == "squawk":
-            return squawk_res
-        raise ValueError(f"unexpected command: {cmd}")
+        handler = handlers.get(cmd[0])
+        if handler is None:
+            raise ValueError(f"unexpected command: {cmd}")
+        return handler(cmd, kwargs)
 
     return side_effect
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "subprocess(**kwargs): fake_subprocess arguments for the fake_run fixture",
+    )
+
+
+@fixture
+def fake_run(request, monkeypatch):
+    """Replace subprocess.run with a recording fake.
+
+    The fake dispatches to fake_subprocess(), configured by the test's
+    `subprocess` marker if it has one. Call the fixture with another side_effect
+    function to replace it; it returns the list of (cmd, kwargs) tuples for every
+    call made.
+    """
+    marker = request.node.get_closest_marker("subprocess")
+    default = fake_subprocess(**(marker.kwargs if marker else {}))
+    calls = []
+
+    def _install(side_effect=None):
+        handler = side_effect or default
+
+        def run(cmd, **kwargs):
+            calls.append((cmd, kwargs))
+            return handler(cmd, **kwargs)
+
+        monkeypatch.setattr(subprocess, "run", run)
+        return calls
+
+    _install()
+    return _install
@@ -0,0 +1,84 @@
+"""Tests for the persistent on-disk cache."""
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from squawk_alembic import cache
+from squawk_alembic.cache import cache_get, cache_path, cache_set
+
+
+def test_roundtrip():
+    cache_set("key", {"revision": "abc123", "down_revision": ["a", "b"]})
+    assert cache_get("key") == {"revision": "abc123", "down_revision": ["a", "b"]}
+
+
+def test_miss_returns_none():
+    assert cache_get("missing") is None
+
+
+def test_uses_xdg_cache_home(isolated_cache):
+    cache_set("key", "value")
+    expected = isolated_cache / "squawk-alembic" / f"cache-{cache.__version__}.sqlite"
+    assert cache_path() == expected
+    assert cache_path().exists()
+
+
+def test_version_change_invalidates(monkeypatch):
+    cache_set("key", "value")
+    monkeypatch.setattr(cache, "__version__", "0.0.0")
+    assert cache_get("key") is None
+
+
+def test_disabled_by_env_var(monkeypatch):
+    monkeypatch.setenv("SQUAWK_ALEMBIC_NO_CACHE", "1")
+    cache_set("key", "value")
+    assert cache_get("key") is None
+    assert not cache_path().exists()
+
+
+def test_unwritable_cache_dir_is_ignored(tmp_path, monkeypatch):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(blocker))
+    cache_set("key", "value")
+    assert cache_get("key") is None
+
+
+def test_undeterminable_home_is_ignored(monkeypatch):
+    monkeypatch.delenv("XDG_CACHE_HOME")
+
+    def no_home():
+        raise RuntimeError("Could not determine home directory.")
+
+    monkeypatch.setattr(Path, "home", no_home)
+    cache_set("key", "value")
+    assert cache_get("key") is None
+
+
+def test_corrupt_entry_is_a_miss():
+    cache_set("key", "value")
+    with closing(sqlite3.connect(cache_path())) as conn, conn:
+        conn.execute("UPDATE cache SET value = ? WHERE key = ?", ('{"trunc', "key"))
+    assert cache_get("key") is None
+    with closing(sqlite3.connect(cache_path())) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cache").fetchone() == (0,)
+
+
+def test_first_write_removes_stale_files_of_other_versions(monkeypatch):
+    monkeypatch.setattr(cache, "_swept", set())
+    directory = cache_path().parent
+    directory.mkdir(parents=True)
+    stale = directory / "cache-0.0.1.sqlite"
+    live = directory / "cache-0.0.2.sqlite"
+    stale.write_bytes(b"")
+    live.write_bytes(b"")
+    long_ago = time.time() - cache.STALE_AFTER_SECONDS - 60
+    os.utime(stale, (long_ago, long_ago))
+
+    cache_set("key", "value")
+    assert not stale.exists()
+    assert live.exists()
+    assert cache_get("key") == "value"
@@ -0,0 +1,68 @@
+"""Tests for the --diff-branch git helpers against a real git repository."""
+
+import shutil
+import subprocess
+
+from pytest import fixture, mark
+
+from squawk_alembic.hook import files_existing_on_branch, resolve_branch
+
+pytestmark = mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+@fixture
+def git_repo(tmp_path, monkeypatch):
+    """Create a git repo with one committed migration on branch main."""
+    monkeypatch.chdir(tmp_path)
+
+    def git(*args):
+        subprocess.run(["git", *args], check=True, capture_output=True)
+
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "test")
+    versions = tmp_path / "migrations" / "versions"
+    versions.mkdir(parents=True)
+    (versions / "001_old.py").write_text("revision = 'old001'\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "initial")
+    (versions / "002_new.py").write_text("revision = 'new002'\n")
+    return tmp_path
+
+
+def test_returns_only_files_on_branch(git_repo):
+    old = "migrations/versions/001_old.py"
+    new = "migrations/versions/002_new.py"
+    assert files_existing_on_branch([old, new], "main") == {old}
+
+
+def test_path_with_spaces(git_repo):
+    path = "migrations/versions/003 spaced.py"
+    (git_repo / path).write_text("revision = 'sp003'\n")
+    assert files_existing_on_branch([path], "main") == set()
+
+
+def test_unknown_branch_reports_nothing_existing(git_repo):
+    assert files_existing_on_branch(["migrations/versions/001_old.py"], "nope") == set()
+
+
+def test_empty_input_skips_git(git_repo, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("git should not run")
+
+    monkeypatch.setattr(subprocess, "run", fail)
+    assert files_existing_on_branch([], "main") == set()
+
+
+def test_resolve_branch_returns_commit_sha(git_repo):
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    assert resolve_branch("main") == head
+    old = "migrations/versions/001_old.py"
+    assert files_existing_on_branch([old], head) == {old}
+
+
+def test_resolve_unknown_branch(git_repo, capsys):
+    assert resolve_branch("nope") is None
+    assert "not found in git" in capsys.readouterr().err
@@ -1,29 +1,25 @@
 """Tests for alembic.ini auto-detection."""
 
-from pytest import fixture
+import os
+from pathlib import Path
 
 from squawk_alembic.hook import find_migrations_path
 
 
-@fixture()
-def repo(tmp_path, monkeypatch):
-    """Set up a fake repo directory and chdir into it."""
-    monkeypatch.chdir(tmp_path)
-    return tmp_path
-
-
-def test_standard_layout(repo):
-    (repo / "migrations" / "versions").mkdir(parents=True)
-    (repo / "alembic.ini").write_text("[alembic]\nscript_location = ./migrations\n")
+def test_standard_layout(empty_repo):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_text(
+        "[alembic]\nscript_location = ./migrations\n"
+    )
     result = find_migrations_path()
     assert result is not None
     assert result.name == "versions"
     assert result.parent.name == "migrations"
 
 
-def test_nested_layout(repo):
-    (repo / "backend" / "migrations" / "versions").mkdir(parents=True)
-    (repo / "alembic.ini").write_text(
+def test_nested_layout(empty_repo):
+    (empty_repo / "backend" / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_text(
         "[alembic]\nscript_location = ./backend/migrations\n"
     )
     result = find_migrations_path()
@@ -32,27 +28,89 @@ def test_nested_layout(repo):
     assert result.parent.name == "migrations"
 
 
-def test_no_dot_slash_prefix(repo):
-    (repo / "migrations" / "versions").mkdir(parents=True)
-    (repo / "alembic.ini").write_text("[alembic]\nscript_location = migrations\n")
+def test_no_dot_slash_prefix(empty_repo):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_text("[alembic]\nscript_location = migrations\n")
     assert find_migrations_path() is not None
 
 
-def test_no_alembic_ini(repo):
+def test_no_alembic_ini(empty_repo):
+    assert find_migrations_path() is None
+
+
+def test_missing_script_location(empty_repo):
+    (empty_repo / "alembic.ini").write_text("[alembic]\n")
     assert find_migrations_path() is None
 
 
-def test_missing_script_location(repo):
-    (repo / "alembic.ini").write_text("[alembic]\n")
+def test_missing_alembic_section(empty_repo):
+    (empty_repo / "alembic.ini").write_text("[other]\nkey = value\n")
     assert find_migrations_path() is None
 
 
-def test_missing_alembic_section(repo):
-    (repo / "alembic.ini").write_text("[other]\nkey = value\n")
+def test_versions_dir_missing(empty_repo):
+    (empty_repo / "migrations").mkdir()
+    (empty_repo / "alembic.ini").write_text(
+        "[alembic]\nscript_location = ./migrations\n"
+    )
     assert find_migrations_path() is None
 
 
-def test_versions_dir_missing(repo):
-    (repo / "migrations").mkdir()
-    (repo / "alembic.ini").write_text("[alembic]\nscript_location = ./migrations\n")
+def test_trailing_whitespace_and_crlf(empty_repo):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_bytes(
+        b"[alembic]\r\nscript_location = ./migrations  \r\n"
+    )
+    assert find_migrations_path() == Path("migrations/versions")
+
+
+def test_script_location_in_other_section_ignored(empty_repo):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_text(
+        "[alembic]\nsqlalchemy.url = postgresql://localhost/db\n\n"
+        "[other]\nscript_location = ./migrations\n"
+    )
     assert find_migrations_path() is None
+
+
+def test_section_after_other_sections(empty_repo):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_text(
+        "[loggers]\nkeys = root\n\n[alembic]\nscript_location = ./migrations\n"
+    )
+    assert find_migrations_path() == Path("migrations/versions")
+
+
+def test_colon_delimiter_falls_back_to_configparser(empty_repo):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_text(
+        "[alembic]\nscript_location: ./migrations\n"
+    )
+    assert find_migrations_path() == Path("migrations/versions")
+
+
+def test_unchanged_config_is_not_reread(empty_repo, monkeypatch):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "alembic.ini").write_text(
+        "[alembic]\nscript_location = ./migrations\n"
+    )
+    assert find_migrations_path() == Path("migrations/versions")
+
+    def fail(self, *args, **kwargs):
+        raise AssertionError("alembic.ini should not be re-read")
+
+    monkeypatch.setattr(Path, "read_text", fail)
+    assert find_migrations_path() == Path("migrations/versions")
+
+
+def test_changed_config_is_reread(empty_repo):
+    (empty_repo / "migrations" / "versions").mkdir(parents=True)
+    (empty_repo / "backend" / "versions").mkdir(parents=True)
+    config = empty_repo / "alembic.ini"
+    config.write_text("[alembic]\nscript_location = ./migrations\n")
+    assert find_migrations_path() == Path("migrations/versions")
+    config.write_text("[alembic]\nscript_location = ./backend\n")
+    # Guard against coarse filesystem timestamps hiding the rewrite.
+    stat = config.stat()
+    os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert find_migrations_path() == Path("backend/versions")
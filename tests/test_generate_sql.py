@@ -1,25 +1,29 @@
 """Tests for generate_sql, exercising it directly rather than through main()."""
 
 import textwrap
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
-
-from squawk_alembic.hook import GenerateSqlError, generate_sql
+from pytest import fixture
+
+from squawk_alembic import hook
+from squawk_alembic.hook import (
+    SQL_CACHE_ENV_VAR,
+    GenerateSqlError,
+    RevisionInfo,
+    _split_upgrade_sql,
+    _sql_chains,
+    _SqlJob,
+    generate_sql,
+)
 
 from .conftest import make_result
 
 
-def write_file(tmp_path, source):
-    path = tmp_path / "migration.py"
-    path.write_text(textwrap.dedent(source))
-    return str(path)
-
-
 @patch("subprocess.run")
-def test_returns_sql_for_valid_migration(mock_run, tmp_path):
-    path = write_file(
-        tmp_path,
+def test_returns_sql_for_valid_migration(mock_run, migration_file):
+    path = migration_file(
         """
         revision = 'abc123'
         down_revision = 'def456'
@@ -33,14 +37,13 @@ def test_returns_sql_for_valid_migration(mock_run, tmp_path):
     assert generate_sql(path) == expected_sql
 
 
-def test_returns_none_for_unparseable_file(tmp_path):
-    path = write_file(tmp_path, "this is not valid python {{{")
+def test_returns_none_for_unparseable_file(migration_file):
+    path = migration_file("this is not valid python {{{")
     assert generate_sql(path) is None
 
 
-def test_returns_none_for_merge_migration(tmp_path):
-    path = write_file(
-        tmp_path,
+def test_returns_none_for_merge_migration(migration_file):
+    path = migration_file(
         """
         revision = 'merge001'
         down_revision = ('abc123', 'def456')
@@ -52,9 +55,8 @@ def test_returns_none_for_merge_migration(tmp_path):
     assert generate_sql(path) is None
 
 
-def test_returns_none_for_missing_revision(tmp_path):
-    path = write_file(
-        tmp_path,
+def test_returns_none_for_missing_revision(migration_file):
+    path = migration_file(
         """
         down_revision = 'def456'
 
@@ -66,9 +68,8 @@ def test_returns_none_for_missing_revision(tmp_path):
 
 
 @patch("subprocess.run")
-def test_uses_base_when_down_revision_is_none(mock_run, tmp_path):
-    path = write_file(
-        tmp_path,
+def test_uses_base_when_down_revision_is_none(mock_run, migration_file):
+    path = migration_file(
         """
         revision = 'first001'
         down_revision = None
@@ -84,9 +85,8 @@ def test_uses_base_when_down_revision_is_none(mock_run, tmp_path):
 
 
 @patch("subprocess.run")
-def test_raises_on_alembic_failure(mock_run, tmp_path):
-    path = write_file(
-        tmp_path,
+def test_raises_on_alembic_failure(mock_run, migration_file):
+    path = migration_file(
         """
         revision = 'abc123'
         down_revision = 'def456'
@@ -101,9 +101,8 @@ def test_raises_on_alembic_failure(mock_run, tmp_path):
 
 
 @patch("subprocess.run")
-def test_raises_when_alembic_not_found(mock_run, tmp_path):
-    path = write_file(
-        tmp_path,
+def test_raises_when_alembic_not_found(mock_run, migration_file):
+    path = migration_file(
         """
         revision = 'abc123'
         down_revision = 'def456'
@@ -118,10 +117,9 @@ def test_raises_when_alembic_not_found(mock_run, tmp_path):
 
 
 @patch("subprocess.run")
-def test_provides_dummy_database_url_when_unset(mock_run, tmp_path, monkeypatch):
+def test_provides_dummy_database_url_when_unset(mock_run, migration_file, monkeypatch):
     monkeypatch.delenv("DATABASE_URL", raising=False)
-    path = write_file(
-        tmp_path,
+    path = migration_file(
         """
         revision = 'abc123'
         down_revision = 'def456'
@@ -137,10 +135,9 @@ def test_provides_dummy_database_url_when_unset(mock_run, tmp_path, monkeypatch)
 
 
 @patch("subprocess.run")
-def test_preserves_existing_database_url(mock_run, tmp_path, monkeypatch):
+def test_preserves_existing_database_url(mock_run, migration_file, monkeypatch):
     monkeypatch.setenv("DATABASE_URL", "postgresql://real-host/real-db")
-    path = write_file(
-        tmp_path,
+    path = migration_file(
         """
         revision = 'abc123'
         down_revision = 'def456'
@@ -153,3 +150,228 @@ def test_preserves_existing_database_url(mock_run, tmp_path, monkeypatch):
     generate_sql(path)
     env = mock_run.call_args[1]["env"]
     assert env["DATABASE_URL"] == "postgresql://real-host/real-db"
+
+
+@fixture
+def alembic_on_path(tmp_path, monkeypatch):
+    """Put a stand-in alembic executable on PATH and opt in to SQL caching."""
+    executable = tmp_path / "bin" / "alembic"
+    executable.parent.mkdir()
+    executable.write_text("#!/bin/sh\n")
+    executable.chmod(0o755)
+    monkeypatch.setenv("PATH", str(executable.parent))
+    monkeypatch.setenv(SQL_CACHE_ENV_VAR, "1")
+    return executable
+
+
+@fixture
+def alembic_project(tmp_path, monkeypatch):
+    """chdir into a project with alembic.ini and env.py."""
+    project = tmp_path / "project"
+    (project / "migrations").mkdir(parents=True)
+    (project / "alembic.ini").write_text("[alembic]\nscript_location = ./migrations\n")
+    (project / "migrations" / "env.py").write_text("# env\n")
+    monkeypatch.chdir(project)
+    return project
+
+
+MIGRATION = """
+    revision = 'abc123'
+    down_revision = 'def456'
+
+    def upgrade():
+        pass
+"""
+
+
+@patch("subprocess.run")
+def test_caches_sql_for_unchanged_migration(mock_run, migration_file, alembic_on_path):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="CREATE TABLE foo (id int);\n")
+    assert generate_sql(path) == "CREATE TABLE foo (id int);\n"
+    assert generate_sql(path) == "CREATE TABLE foo (id int);\n"
+    assert mock_run.call_count == 1
+
+
+@patch("subprocess.run")
+def test_cache_invalidated_by_migration_change(mock_run, tmp_path, alembic_on_path):
+    # Rewrites the file in place, so it can't use the shared migration_file.
+    path = tmp_path / "migration.py"
+    path.write_text(textwrap.dedent(MIGRATION))
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    generate_sql(path)
+    path.write_text(textwrap.dedent(MIGRATION) + "# edited\n")
+    generate_sql(path)
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_cache_invalidated_by_database_url(
+    mock_run, migration_file, alembic_on_path, monkeypatch
+):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    monkeypatch.setenv("DATABASE_URL", "postgresql://one/db")
+    generate_sql(path)
+    monkeypatch.setenv("DATABASE_URL", "postgresql://two/db")
+    generate_sql(path)
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_cache_invalidated_by_other_env_var(
+    mock_run, migration_file, alembic_on_path, monkeypatch
+):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    generate_sql(path)
+    monkeypatch.setenv("MIGRATIONS_SCHEMA", "tenant")
+    generate_sql(path)
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_cache_invalidated_by_sqlalchemy_upgrade(
+    mock_run, migration_file, alembic_on_path, monkeypatch
+):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    generate_sql(path)
+    version = hook.metadata.version
+
+    def upgraded(distribution):
+        return "99.0" if distribution == "SQLAlchemy" else version(distribution)
+
+    monkeypatch.setattr(hook.metadata, "version", upgraded)
+    generate_sql(path)
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_cache_invalidated_by_env_py_change(
+    mock_run, migration_file, alembic_on_path, alembic_project
+):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    generate_sql(path)
+    (alembic_project / "migrations" / "env.py").write_text("# env, edited\n")
+    generate_sql(path)
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_failed_run_is_not_cached(mock_run, migration_file, alembic_on_path):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(returncode=1, stderr="some error")
+    with pytest.raises(GenerateSqlError):
+        generate_sql(path)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    assert generate_sql(path) == "SQL;\n"
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_no_cache_when_alembic_not_on_path(
+    mock_run, tmp_path, migration_file, monkeypatch
+):
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    generate_sql(path)
+    generate_sql(path)
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_sql_not_cached_by_default(
+    mock_run, migration_file, alembic_on_path, monkeypatch
+):
+    monkeypatch.delenv(SQL_CACHE_ENV_VAR)
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    generate_sql(path)
+    generate_sql(path)
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_caller_env_without_database_url(mock_run, migration_file, alembic_on_path):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    env = {"PATH": str(alembic_on_path.parent), SQL_CACHE_ENV_VAR: "1"}
+    assert generate_sql(path, env=env) == "SQL;\n"
+
+
+@patch("subprocess.run")
+def test_reads_migration_once(mock_run, migration_file, alembic_on_path, monkeypatch):
+    path = migration_file(MIGRATION)
+    mock_run.return_value = make_result(stdout="SQL;\n")
+    reads = []
+    read_bytes = Path.read_bytes
+
+    def counting_read_bytes(self):
+        if str(self) == path:
+            reads.append(self)
+        return read_bytes(self)
+
+    monkeypatch.setattr(Path, "read_bytes", counting_read_bytes)
+    generate_sql(path)
+    assert len(reads) == 1
+
+
+def sql_job(revision, down_revision):
+    info = RevisionInfo(revision=revision, down_revision=down_revision, is_merge=False)
+    return _SqlJob(filepath=f"{revision}.py", info=info, cache_key=None)
+
+
+def test_chains_follow_consecutive_revisions():
+    jobs = [
+        sql_job("c", "b"),
+        sql_job("x", "w"),
+        sql_job("a", "prev"),
+        sql_job("b", "a"),
+    ]
+    assert _sql_chains(jobs) == [[1], [2, 3, 0]]
+
+
+def test_chains_stop_at_branch_points():
+    jobs = [sql_job("a", "prev"), sql_job("b1", "a"), sql_job("b2", "a")]
+    assert _sql_chains(jobs) == [[0], [1], [2]]
+
+
+def test_chains_never_start_from_base():
+    jobs = [sql_job("a", None), sql_job("b", "a")]
+    assert _sql_chains(jobs) == [[0], [1]]
+
+
+def test_chains_skip_duplicate_revisions():
+    jobs = [sql_job("a", "prev"), sql_job("b", "a"), sql_job("b", "a")]
+    assert _sql_chains(jobs) == [[0], [1], [2]]
+
+
+STEP_A = "-- Running upgrade prev -> a\n\nCREATE TABLE a (id int);\n\n"
+STEP_B = "-- Running upgrade a -> b\n\nCREATE TABLE b (id int);\n\n"
+
+
+def test_split_single_transaction():
+    sql = f"BEGIN;\n\n{STEP_A}{STEP_B}COMMIT;\n\n"
+    pieces = _split_upgrade_sql(sql, [sql_job("a", "prev"), sql_job("b", "a")])
+    assert pieces == [
+        f"BEGIN;\n\n{STEP_A}COMMIT;\n\n",
+        f"BEGIN;\n\n{STEP_B}COMMIT;\n\n",
+    ]
+
+
+def test_split_transaction_per_migration():
+    sql = f"BEGIN;\n\n{STEP_A}COMMIT;\n\nBEGIN;\n\n{STEP_B}COMMIT;\n\n"
+    pieces = _split_upgrade_sql(sql, [sql_job("a", "prev"), sql_job("b", "a")])
+    assert pieces == [
+        f"BEGIN;\n\n{STEP_A}COMMIT;\n\n",
+        f"BEGIN;\n\n{STEP_B}COMMIT;\n\n",
+    ]
+
+
+def test_split_rejects_unexpected_steps():
+    sql = f"BEGIN;\n\n{STEP_A}{STEP_B}COMMIT;\n\n"
+    assert _split_upgrade_sql(sql, [sql_job("a", "prev"), sql_job("c", "a")]) is None
+    assert _split_upgrade_sql(sql, [sql_job("a", "prev")]) is None
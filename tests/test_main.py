@@ -2,35 +2,59 @@
 
 import os
 import sys
-from unittest.mock import patch
+import threading
+from pathlib import Path
 
-from squawk_alembic.hook import main
+from pytest import mark
 
-from .conftest import fake_subprocess, make_result, write_migration
+from squawk_alembic.hook import main
 
+from .conftest import BRANCH_SHA, make_result, write_migration
 
-def test_no_files(repo, monkeypatch):
-    monkeypatch.setattr(sys, "argv", ["squawk-alembic"])
-    assert main() == 0
+# Never let a main() test reach a real git, alembic or squawk.
+pytestmark = mark.usefixtures("fake_run")
 
 
-def test_no_alembic_ini(tmp_path, monkeypatch, capsys):
-    monkeypatch.chdir(tmp_path)
+def test_no_alembic_ini(empty_repo, monkeypatch, capsys):
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", "some_file.py"])
     assert main() == 1
     captured = capsys.readouterr()
     assert "could not find alembic.ini" in captured.err
 
 
-def test_file_outside_migrations_skipped(repo, monkeypatch):
-    other = repo / "other.py"
-    other.write_text("op.execute('DROP TABLE foo')")
-    monkeypatch.setattr(sys, "argv", ["squawk-alembic", "other.py"])
+@mark.parametrize(
+    "args",
+    [[], ["other.py"], ["migrations/versions/../other.py"]],
+    ids=["no_files", "outside_migrations", "escaping_versions_dir"],
+)
+def test_nothing_to_lint(args, fake_run, repo, monkeypatch):
+    (repo / "other.py").write_text("op.execute('DROP TABLE foo')")
+    (repo / "migrations" / "other.py").write_text("revision = 'esc001'\n")
+    calls = fake_run()
+    monkeypatch.setattr(sys, "argv", ["squawk-alembic", *args])
     assert main() == 0
+    assert calls == []
 
 
-@patch("subprocess.run")
-def test_squawk_success(mock_run, repo, monkeypatch):
+def test_dot_slash_path_is_linted(fake_run, repo, monkeypatch):
+    path = write_migration(
+        repo,
+        "033_dot_slash.py",
+        """
+        revision = 'dot001'
+        down_revision = 'prev001'
+
+        def upgrade():
+            pass
+        """,
+    )
+    calls = fake_run()
+    monkeypatch.setattr(sys, "argv", ["squawk-alembic", f"./{path}"])
+    assert main() == 0
+    assert len(calls) == 2
+
+
+def test_squawk_success(fake_run, repo, monkeypatch):
     path = write_migration(
         repo,
         "002_raw_sql.py",
@@ -44,19 +68,21 @@ def test_squawk_success(mock_run, repo, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess()
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 0
-    assert mock_run.call_count == 2
-    alembic_call = mock_run.call_args_list[0][0][0]
+    assert len(calls) == 2
+    alembic_call = calls[0][0]
     assert alembic_call[0] == "alembic"
     assert "def456:abc123" in alembic_call
-    squawk_call = mock_run.call_args_list[1][0][0]
+    squawk_call = calls[1][0]
     assert squawk_call[0] == "squawk"
 
 
-@patch("subprocess.run")
-def test_squawk_failure(mock_run, repo, capsys, monkeypatch):
+@mark.subprocess(
+    squawk_result=make_result(returncode=1, stdout="some squawk warning\n")
+)
+def test_squawk_failure(fake_run, repo, capsys, monkeypatch):
     path = write_migration(
         repo,
         "003_bad_sql.py",
@@ -70,23 +96,20 @@ def test_squawk_failure(mock_run, repo, capsys, monkeypatch):
             op.execute("ALTER TABLE foo ADD COLUMN bar int")
         """,
     )
-    mock_run.side_effect = fake_subprocess(
-        squawk_result=make_result(returncode=1, stdout="some squawk warning\n"),
-    )
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 1
     captured = capsys.readouterr()
     assert "some squawk warning" in captured.out
 
 
-@patch("subprocess.run")
-def test_squawk_failure_replaces_tmp_path_in_output(
-    mock_run, repo, capsys, monkeypatch
-):
-    """Squawk output should show the original migration path, not the temp file path."""
+@mark.subprocess(
+    alembic_result=make_result(stdout="ALTER TABLE foo ADD COLUMN bar int;\n")
+)
+def test_single_file_piped_to_squawk_stdin(fake_run, repo, monkeypatch):
+    """A single migration's SQL goes to squawk on stdin, reported under the migration path."""
     path = write_migration(
         repo,
-        "020_path_rewrite.py",
+        "020_stdin.py",
         """
         revision = 'rw001'
         down_revision = 'prev001'
@@ -97,31 +120,16 @@ def test_squawk_failure_replaces_tmp_path_in_output(
             op.execute("ALTER TABLE foo ADD COLUMN bar int")
         """,
     )
-
-    def side_effect(cmd, **kwargs):
-        if cmd[0] == "alembic":
-            return make_result(stdout="ALTER TABLE foo ADD COLUMN bar int;\n")
-        if cmd[0] == "squawk":
-            tmp = cmd[1]
-            return make_result(
-                returncode=1,
-                stdout=f"{tmp}:1: warning: prefer-robust-stmts\n",
-                stderr=f"error in {tmp}\n",
-            )
-        raise ValueError(f"unexpected command: {cmd}")
-
-    mock_run.side_effect = side_effect
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
-    assert main() == 1
-    captured = capsys.readouterr()
-    assert path in captured.out
-    assert path in captured.err
-    assert "/tmp/" not in captured.out
-    assert "/tmp/" not in captured.err
+    assert main() == 0
+    squawk_cmd, squawk_kwargs = calls[1]
+    assert squawk_cmd == ["squawk", f"--stdin-filepath={path}"]
+    assert squawk_kwargs["input"] == "ALTER TABLE foo ADD COLUMN bar int;\n"
 
 
-@patch("subprocess.run")
-def test_alembic_failure_fails_run(mock_run, repo, capsys, monkeypatch):
+@mark.subprocess(alembic_result=make_result(returncode=1, stderr="alembic error\n"))
+def test_alembic_failure_fails_run(fake_run, repo, capsys, monkeypatch):
     path = write_migration(
         repo,
         "004_alembic_fail.py",
@@ -135,9 +143,6 @@ def test_alembic_failure_fails_run(mock_run, repo, capsys, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess(
-        alembic_result=make_result(returncode=1, stderr="alembic error\n"),
-    )
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 1
     captured = capsys.readouterr()
@@ -168,8 +173,7 @@ def test_unreadable_migration_file(repo, capsys, monkeypatch):
         os.chmod(unreadable, 0o644)
 
 
-@patch("subprocess.run")
-def test_missing_alembic_binary(mock_run, repo, capsys, monkeypatch):
+def test_missing_alembic_binary(fake_run, repo, capsys, monkeypatch):
     path = write_migration(
         repo,
         "005_no_alembic.py",
@@ -189,15 +193,45 @@ def test_missing_alembic_binary(mock_run, repo, capsys, monkeypatch):
             raise FileNotFoundError
         raise ValueError(f"unexpected command: {cmd}")
 
-    mock_run.side_effect = alembic_not_found
+    fake_run(alembic_not_found)
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 1
     captured = capsys.readouterr()
     assert "alembic not found" in captured.err
 
 
-@patch("subprocess.run")
-def test_missing_squawk_binary(mock_run, repo, capsys, monkeypatch):
+def test_alembic_not_executable(fake_run, repo, capsys, monkeypatch):
+    """An alembic that can't be started is reported per file, not as a traceback."""
+    path1 = write_migration(
+        repo,
+        "036_noexec_a.py",
+        """
+        revision = 'ne001'
+        down_revision = 'prev001'
+        """,
+    )
+    path2 = write_migration(
+        repo,
+        "037_noexec_b.py",
+        """
+        revision = 'ne002'
+        down_revision = 'ne001'
+        """,
+    )
+
+    def alembic_not_executable(cmd, **kwargs):
+        if cmd[0] == "alembic":
+            raise PermissionError(13, "Permission denied", "alembic")
+        raise ValueError(f"unexpected command: {cmd}")
+
+    fake_run(alembic_not_executable)
+    monkeypatch.setattr(sys, "argv", ["squawk-alembic", path1, path2])
+    assert main() == 1
+    captured = capsys.readouterr()
+    assert captured.err.count("cannot run alembic: [Errno 13] Permission denied") == 2
+
+
+def test_missing_squawk_binary(fake_run, repo, capsys, monkeypatch):
     """When squawk is not installed, the hook should fail with a helpful message."""
     path = write_migration(
         repo,
@@ -220,15 +254,14 @@ def test_missing_squawk_binary(mock_run, repo, capsys, monkeypatch):
             raise FileNotFoundError
         raise ValueError(f"unexpected command: {cmd}")
 
-    mock_run.side_effect = squawk_not_found
+    fake_run(squawk_not_found)
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 1
     captured = capsys.readouterr()
     assert "squawk not found" in captured.err
 
 
-@patch("subprocess.run")
-def test_merge_migration_skipped(mock_run, repo, monkeypatch):
+def test_merge_migration_skipped(fake_run, repo, monkeypatch):
     path = write_migration(
         repo,
         "006_merge.py",
@@ -242,13 +275,13 @@ def test_merge_migration_skipped(mock_run, repo, monkeypatch):
             pass
         """,
     )
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 0
-    mock_run.assert_not_called()
+    assert calls == []
 
 
-@patch("subprocess.run")
-def test_first_migration_uses_base(mock_run, repo, monkeypatch):
+def test_first_migration_uses_base(fake_run, repo, monkeypatch):
     path = write_migration(
         repo,
         "007_first.py",
@@ -262,15 +295,14 @@ def test_first_migration_uses_base(mock_run, repo, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess()
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 0
-    alembic_call = mock_run.call_args_list[0][0][0]
+    alembic_call = calls[0][0]
     assert "base:first001" in alembic_call
 
 
-@patch("subprocess.run")
-def test_multiple_files_all_pass(mock_run, repo, monkeypatch):
+def test_multiple_files_all_pass(fake_run, repo, monkeypatch):
     """All files should be processed when multiple are passed."""
     path1 = write_migration(
         repo,
@@ -290,7 +322,7 @@ def test_multiple_files_all_pass(mock_run, repo, monkeypatch):
         "023_multi_b.py",
         """
         revision = 'mb001'
-        down_revision = 'ma001'
+        down_revision = 'prev002'
 
         from alembic import op
 
@@ -298,16 +330,74 @@ def test_multiple_files_all_pass(mock_run, repo, monkeypatch):
             op.execute("CREATE TABLE b (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess()
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path1, path2])
     assert main() == 0
-    # alembic + squawk for each file = 4 calls
-    assert mock_run.call_count == 4
+    # alembic for each file + a single squawk run over both = 3 calls
+    assert len(calls) == 3
+    # The alembic environment is built once and shared by every run.
+    assert calls[0][1]["env"] is calls[1][1]["env"]
+    squawk_call = calls[2][0]
+    assert squawk_call[0] == "squawk"
+    assert len(squawk_call) == 3
+
+
+def test_multiple_files_output_maps_to_each_migration(
+    fake_run, repo, capsys, monkeypatch
+):
+    """With one squawk run over several files, each violation should name its migration."""
+    path1 = write_migration(
+        repo,
+        "027_batch_a.py",
+        """
+        revision = 'ba001'
+        down_revision = 'prev001'
+
+        from alembic import op
+
+        def upgrade():
+            op.execute("ALTER TABLE a ADD COLUMN x int")
+        """,
+    )
+    path2 = write_migration(
+        repo,
+        "028_batch_b.py",
+        """
+        revision = 'bb001'
+        down_revision = 'prev002'
+
+        from alembic import op
+
+        def upgrade():
+            op.execute("ALTER TABLE b ADD COLUMN y int")
+        """,
+    )
+
+    def side_effect(cmd, **kwargs):
+        if cmd[0] == "alembic":
+            return make_result(stdout="ALTER TABLE a ADD COLUMN x int;\n")
+        if cmd[0] == "squawk":
+            tmp1, tmp2 = cmd[1:]
+            return make_result(
+                returncode=1,
+                stdout=f"{tmp1}:1: warning: a\n{tmp2}:1: warning: b\n",
+                stderr=f"error in {tmp2}\n",
+            )
+        raise ValueError(f"unexpected command: {cmd}")
+
+    fake_run(side_effect)
+    monkeypatch.setattr(sys, "argv", ["squawk-alembic", path1, path2])
+    assert main() == 1
+    captured = capsys.readouterr()
+    assert f"{path1}:1: warning: a" in captured.out
+    assert f"{path2}:1: warning: b" in captured.out
+    assert f"error in {path2}" in captured.err
+    assert "/tmp/" not in captured.out
+    assert "/tmp/" not in captured.err
 
 
-@patch("subprocess.run")
 def test_multiple_files_first_fails_second_still_runs(
-    mock_run, repo, capsys, monkeypatch
+    fake_run, repo, capsys, monkeypatch
 ):
     """A failure in one file should not prevent linting of subsequent files."""
     path1 = write_migration(
@@ -337,29 +427,120 @@ def test_multiple_files_first_fails_second_still_runs(
         """,
     )
 
-    call_count = {"alembic": 0}
-
     def side_effect(cmd, **kwargs):
         if cmd[0] == "alembic":
-            call_count["alembic"] += 1
-            if call_count["alembic"] == 1:
+            # The combined run over both migrations fails along with the first.
+            if "prev001:f001" in cmd or "prev001:p001" in cmd:
                 return make_result(returncode=1, stderr="alembic error on first\n")
             return make_result(stdout="CREATE TABLE bar (id int);\n")
         if cmd[0] == "squawk":
             return make_result()
         raise ValueError(f"unexpected command: {cmd}")
 
-    mock_run.side_effect = side_effect
+    calls = fake_run(side_effect)
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path1, path2])
     assert main() == 1
-    # alembic (fail) + alembic (pass) + squawk (pass) = 3
-    assert mock_run.call_count == 3
+    # alembic over both (fail), then per file: alembic (fail) + alembic (pass),
+    # then squawk (pass) = 4
+    assert len(calls) == 4
+    assert "prev001:p001" in calls[0][0]
     captured = capsys.readouterr()
-    assert "alembic upgrade --sql failed" in captured.err
+    assert f"alembic upgrade --sql failed for {path1}" in captured.err
+    assert path2 not in captured.err
+
+
+def test_consecutive_migrations_share_one_alembic_run(fake_run, repo, monkeypatch):
+    """A chain of migrations is generated by one alembic run and split per migration."""
+    path1 = write_migration(
+        repo,
+        "034_chain_a.py",
+        """
+        revision = 'ch001'
+        down_revision = 'prev001'
+        """,
+    )
+    path2 = write_migration(
+        repo,
+        "035_chain_b.py",
+        """
+        revision = 'ch002'
+        down_revision = 'ch001'
+        """,
+    )
+    step1 = (
+        "-- Running upgrade prev001 -> ch001\n\nCREATE TABLE a (id int);\n\n"
+        "UPDATE alembic_version SET version_num='ch001';\n\n"
+    )
+    step2 = (
+        "-- Running upgrade ch001 -> ch002\n\nCREATE TABLE b (id int);\n\n"
+        "UPDATE alembic_version SET version_num='ch002';\n\n"
+    )
+    linted = []
+
+    def side_effect(cmd, **kwargs):
+        if cmd[0] == "alembic":
+            return make_result(stdout=f"BEGIN;\n\n{step1}{step2}COMMIT;\n\n")
+        if cmd[0] == "squawk":
+            linted.extend(Path(path).read_text() for path in cmd[1:])
+            return make_result()
+        raise ValueError(f"unexpected command: {cmd}")
+
+    calls = fake_run(side_effect)
+    monkeypatch.setattr(sys, "argv", ["squawk-alembic", path2, path1])
+    assert main() == 0
+    assert [cmd[0] for cmd, _ in calls] == ["alembic", "squawk"]
+    assert "prev001:ch002" in calls[0][0]
+    # Each migration is linted as if alembic had run over it alone.
+    assert linted == [
+        f"BEGIN;\n\n{step2}COMMIT;\n\n",
+        f"BEGIN;\n\n{step1}COMMIT;\n\n",
+    ]
+
+
+def test_multiple_files_generate_sql_concurrently(fake_run, repo, monkeypatch):
+    """alembic runs for different migrations should overlap rather than run serially."""
+    path1 = write_migration(
+        repo,
+        "029_parallel_a.py",
+        """
+        revision = 'pa001'
+        down_revision = 'prev001'
+
+        def upgrade():
+            pass
+        """,
+    )
+    path2 = write_migration(
+        repo,
+        "030_parallel_b.py",
+        """
+        revision = 'pb001'
+        down_revision = 'prev002'
+
+        def upgrade():
+            pass
+        """,
+    )
+    # Both alembic calls must be in flight at once to get past the barrier.
+    barrier = threading.Barrier(2, timeout=5)
 
+    def side_effect(cmd, **kwargs):
+        if cmd[0] == "alembic":
+            barrier.wait()
+            return make_result(stdout="CREATE TABLE foo (id int);\n")
+        if cmd[0] == "squawk":
+            return make_result()
+        raise ValueError(f"unexpected command: {cmd}")
 
-@patch("subprocess.run")
-def test_diff_branch_skips_existing_file(mock_run, repo, monkeypatch):
+    calls = fake_run(side_effect)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(sys, "argv", ["squawk-alembic", path1, path2])
+    assert main() == 0
+    assert len(calls) == 3
+
+
+@mark.subprocess(git_exists_on_branch=True)
+def test_diff_branch_skips_existing_file(fake_run, repo, monkeypatch):
     path = write_migration(
         repo,
         "008_existing.py",
@@ -373,17 +554,17 @@ def test_diff_branch_skips_existing_file(mock_run, repo, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess(git_exists_on_branch=True)
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", "--diff-branch", "main", path])
     assert main() == 0
     # git rev-parse (validation) + git cat-file (exists check), no alembic or squawk
-    assert mock_run.call_count == 2
-    assert mock_run.call_args_list[0][0][0][0] == "git"
-    assert mock_run.call_args_list[1][0][0][0] == "git"
+    assert len(calls) == 2
+    assert calls[0][0][0] == "git"
+    assert calls[1][0][0] == "git"
 
 
-@patch("subprocess.run")
-def test_diff_branch_lints_new_file(mock_run, repo, monkeypatch):
+@mark.subprocess(git_exists_on_branch=False)
+def test_diff_branch_lints_new_file(fake_run, repo, monkeypatch):
     path = write_migration(
         repo,
         "009_new.py",
@@ -397,15 +578,64 @@ def test_diff_branch_lints_new_file(mock_run, repo, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess(git_exists_on_branch=False)
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", "--diff-branch", "main", path])
     assert main() == 0
     # git rev-parse + git cat-file + alembic + squawk = 4 calls
-    assert mock_run.call_count == 4
+    assert len(calls) == 4
+
+
+def test_diff_branch_checks_all_files_in_one_git_call(fake_run, repo, monkeypatch):
+    path1 = write_migration(
+        repo,
+        "031_old.py",
+        """
+        revision = 'old001'
+        down_revision = 'prev001'
+
+        def upgrade():
+            pass
+        """,
+    )
+    path2 = write_migration(
+        repo,
+        "032_new.py",
+        """
+        revision = 'new002'
+        down_revision = 'old001'
+
+        def upgrade():
+            pass
+        """,
+    )
+
+    def side_effect(cmd, **kwargs):
+        if cmd[0] == "git" and "rev-parse" in cmd:
+            return make_result(stdout=f"{BRANCH_SHA}\n")
+        if cmd[0] == "git" and "cat-file" in cmd:
+            # The branch is resolved once and looked up by commit SHA.
+            assert kwargs["input"] == f"{BRANCH_SHA}:{path1}\n{BRANCH_SHA}:{path2}\n"
+            return make_result(stdout=f"blob\n{BRANCH_SHA}:{path2} missing\n")
+        if cmd[0] == "alembic":
+            return make_result(stdout="CREATE TABLE foo (id int);\n")
+        if cmd[0] == "squawk":
+            return make_result()
+        raise ValueError(f"unexpected command: {cmd}")
 
+    calls = fake_run(side_effect)
+    monkeypatch.setattr(
+        sys, "argv", ["squawk-alembic", "--diff-branch", "main", path1, path2]
+    )
+    assert main() == 0
+    # git rev-parse + one git cat-file for both files + alembic and squawk for the new one
+    commands = [cmd for cmd, _ in calls]
+    assert [cmd[0] for cmd in commands] == ["git", "git", "alembic", "squawk"]
+    assert commands[0] == ["git", "rev-parse", "--verify", "main^{commit}"]
+    assert "old001:new002" in commands[2]
 
-@patch("subprocess.run")
-def test_diff_branch_nonexistent_branch_errors(mock_run, repo, capsys, monkeypatch):
+
+@mark.subprocess(git_branch_valid=False)
+def test_diff_branch_nonexistent_branch_errors(fake_run, repo, capsys, monkeypatch):
     path = write_migration(
         repo,
         "011_nonexistent.py",
@@ -419,19 +649,18 @@ def test_diff_branch_nonexistent_branch_errors(mock_run, repo, capsys, monkeypat
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess(git_branch_valid=False)
+    calls = fake_run()
     monkeypatch.setattr(
         sys, "argv", ["squawk-alembic", "--diff-branch", "nonexistent", path]
     )
     assert main() == 1
     # Only the git rev-parse validation call, then early exit
-    assert mock_run.call_count == 1
+    assert len(calls) == 1
     captured = capsys.readouterr()
     assert "not found in git" in captured.err
 
 
-@patch("subprocess.run")
-def test_diff_branch_traversal_rejected(mock_run, repo, capsys, monkeypatch):
+def test_diff_branch_traversal_rejected(fake_run, repo, capsys, monkeypatch):
     path = write_migration(
         repo,
         "013_traversal.py",
@@ -445,17 +674,17 @@ def test_diff_branch_traversal_rejected(mock_run, repo, capsys, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
+    calls = fake_run()
     monkeypatch.setattr(
         sys, "argv", ["squawk-alembic", "--diff-branch", "refs/../main", path]
     )
     assert main() == 1
-    mock_run.assert_not_called()
+    assert calls == []
     captured = capsys.readouterr()
     assert "invalid branch name" in captured.err
 
 
-@patch("subprocess.run")
-def test_diff_branch_missing_git_binary(mock_run, repo, capsys, monkeypatch):
+def test_diff_branch_missing_git_binary(fake_run, repo, capsys, monkeypatch):
     path = write_migration(
         repo,
         "014_no_git.py",
@@ -469,15 +698,18 @@ def test_diff_branch_missing_git_binary(mock_run, repo, capsys, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = FileNotFoundError
+
+    def git_not_found(cmd, **kwargs):
+        raise FileNotFoundError
+
+    fake_run(git_not_found)
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", "--diff-branch", "main", path])
     assert main() == 1
     captured = capsys.readouterr()
     assert "git not found" in captured.err
 
 
-@patch("subprocess.run")
-def test_without_diff_branch_lints_all(mock_run, repo, monkeypatch):
+def test_without_diff_branch_lints_all(fake_run, repo, monkeypatch):
     path = write_migration(
         repo,
         "010_all.py",
@@ -491,15 +723,17 @@ def test_without_diff_branch_lints_all(mock_run, repo, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess()
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", path])
     assert main() == 0
     # No git call, just alembic + squawk = 2 calls
-    assert mock_run.call_count == 2
+    assert len(calls) == 2
 
 
-@patch("subprocess.run")
-def test_origin_branch_shallow_fetch_succeeds(mock_run, repo, monkeypatch):
+@mark.subprocess(
+    git_branch_valid=False, git_fetch_succeeds=True, git_exists_on_branch=False
+)
+def test_origin_branch_shallow_fetch_succeeds(fake_run, repo, monkeypatch):
     """In CI shallow clones, origin/main may not exist locally; the hook should fetch it."""
     path = write_migration(
         repo,
@@ -514,24 +748,20 @@ def test_origin_branch_shallow_fetch_succeeds(mock_run, repo, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess(
-        git_branch_valid=False,
-        git_fetch_succeeds=True,
-        git_exists_on_branch=False,
-    )
+    calls = fake_run()
     monkeypatch.setattr(
         sys, "argv", ["squawk-alembic", "--diff-branch", "origin/main", path]
     )
     assert main() == 0
     # git rev-parse (fail) + git fetch + git cat-file + alembic + squawk = 5 calls
-    assert mock_run.call_count == 5
-    assert mock_run.call_args_list[0][0][0][0] == "git"
-    assert "fetch" in mock_run.call_args_list[1][0][0]
-    assert "cat-file" in mock_run.call_args_list[2][0][0]
+    assert len(calls) == 5
+    assert calls[0][0][0] == "git"
+    assert "fetch" in calls[1][0]
+    assert "cat-file" in calls[2][0]
 
 
-@patch("subprocess.run")
-def test_origin_branch_shallow_fetch_fails(mock_run, repo, capsys, monkeypatch):
+@mark.subprocess(git_branch_valid=False, git_fetch_succeeds=False)
+def test_origin_branch_shallow_fetch_fails(fake_run, repo, capsys, monkeypatch):
     """When both rev-parse and fetch fail, the hook should error."""
     path = write_migration(
         repo,
@@ -546,22 +776,19 @@ def test_origin_branch_shallow_fetch_fails(mock_run, repo, capsys, monkeypatch):
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess(
-        git_branch_valid=False,
-        git_fetch_succeeds=False,
-    )
+    calls = fake_run()
     monkeypatch.setattr(
         sys, "argv", ["squawk-alembic", "--diff-branch", "origin/main", path]
     )
     assert main() == 1
     # git rev-parse (fail) + git fetch (fail) = 2 calls
-    assert mock_run.call_count == 2
+    assert len(calls) == 2
     captured = capsys.readouterr()
     assert "not found in git" in captured.err
 
 
-@patch("subprocess.run")
-def test_non_origin_branch_no_fetch_attempted(mock_run, repo, capsys, monkeypatch):
+@mark.subprocess(git_branch_valid=False)
+def test_non_origin_branch_no_fetch_attempted(fake_run, repo, capsys, monkeypatch):
     """Non-origin branches should not trigger a fetch attempt."""
     path = write_migration(
         repo,
@@ -576,10 +803,10 @@ def test_non_origin_branch_no_fetch_attempted(mock_run, repo, capsys, monkeypatc
             op.execute("CREATE TABLE foo (id int)")
         """,
     )
-    mock_run.side_effect = fake_subprocess(git_branch_valid=False)
+    calls = fake_run()
     monkeypatch.setattr(sys, "argv", ["squawk-alembic", "--diff-branch", "main", path])
     assert main() == 1
     # Only git rev-parse (fail), no fetch attempted
-    assert mock_run.call_count == 1
+    assert len(calls) == 1
     captured = capsys.readouterr()
     assert "not found in git" in captured.err
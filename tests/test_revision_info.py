@@ -1,144 +1,172 @@
 """Tests for extract_revision_info from Alembic migration files."""
 
-import textwrap
-
-from pytest import fixture
+from pytest import mark
 
+from squawk_alembic import hook
 from squawk_alembic.hook import extract_revision_info
 
-
-@fixture()
-def migration_file(tmp_path):
-    """Write a migration file and return its path."""
-
-    def _write(source):
-        path = tmp_path / "migration.py"
-        path.write_text(textwrap.dedent(source))
-        return str(path)
-
-    return _write
+PLAIN = """
+    revision = {revision!r}
+    down_revision = {down_revision!r}
+    branch_labels = None
+    depends_on = None
+
+    def upgrade():
+        pass
+"""
+
+ANNOTATED = """
+    from typing import Sequence, Union
+
+    revision: str = {revision!r}
+    down_revision: Union[str, None] = {down_revision!r}
+    branch_labels: Union[str, Sequence[str], None] = None
+    depends_on: Union[str, Sequence[str], None] = None
+
+    def upgrade():
+        pass
+"""
+
+
+@mark.parametrize("template", [PLAIN, ANNOTATED], ids=["plain", "annotated"])
+@mark.parametrize(
+    ("revision", "down_revision", "is_merge"),
+    [
+        ("abc123", "def456", False),
+        ("abc123", None, False),
+        ("merge001", ("abc123", "def456"), True),
+    ],
+    ids=["standard", "first", "merge"],
+)
+def test_revision_assignments(
+    migration_file, template, revision, down_revision, is_merge
+):
+    path = migration_file(
+        template.format(revision=revision, down_revision=down_revision)
+    )
+    info = extract_revision_info(path)
+    assert info is not None
+    assert info.revision == revision
+    assert info.down_revision == down_revision
+    assert info.is_merge is is_merge
 
 
-def test_standard_migration(migration_file):
+def test_syntax_error_returns_none(migration_file):
     path = migration_file("""
-        revision = 'abc123'
-        down_revision = 'def456'
-        branch_labels = None
-        depends_on = None
-
-        def upgrade():
-            pass
+        this is not valid python {{{
     """)
-    info = extract_revision_info(path)
-    assert info is not None
-    assert info.revision == "abc123"
-    assert info.down_revision == "def456"
-    assert info.is_merge is False
+    assert extract_revision_info(path) is None
 
 
-def test_first_migration_down_revision_is_none(migration_file):
+def test_missing_revision_variable_returns_none(migration_file):
     path = migration_file("""
-        revision = 'abc123'
-        down_revision = None
-        branch_labels = None
-        depends_on = None
+        down_revision = 'def456'
 
         def upgrade():
             pass
     """)
-    info = extract_revision_info(path)
-    assert info is not None
-    assert info.revision == "abc123"
-    assert info.down_revision is None
-    assert info.is_merge is False
+    assert extract_revision_info(path) is None
 
 
-def test_merge_migration_tuple_down_revision(migration_file):
+def test_cached_result_skips_parsing(migration_file, monkeypatch):
     path = migration_file("""
         revision = 'merge001'
         down_revision = ('abc123', 'def456')
-        branch_labels = None
-        depends_on = None
-
-        def upgrade():
-            pass
     """)
+    first = extract_revision_info(path)
+
+    def fail(source):
+        raise AssertionError("should not re-parse an unchanged file")
+
+    monkeypatch.setattr(hook, "_parse_revision_info", fail)
+    assert extract_revision_info(path) == first
+
+
+def test_changed_file_is_reparsed(tmp_path):
+    # Rewrites one path in place, so it can't use the content-keyed fixture.
+    path = tmp_path / "migration.py"
+    path.write_text("revision = 'abc123'\ndown_revision = None\n")
     info = extract_revision_info(path)
     assert info is not None
-    assert info.revision == "merge001"
-    assert info.down_revision == ("abc123", "def456")
-    assert info.is_merge is True
+    assert info.down_revision is None
+    path.write_text("revision = 'abc123'\ndown_revision = 'def456'\n")
+    info = extract_revision_info(path)
+    assert info is not None
+    assert info.down_revision == "def456"
 
 
-def test_syntax_error_returns_none(migration_file):
+def test_file_without_revision_skips_parsing(migration_file, monkeypatch):
     path = migration_file("""
-        this is not valid python {{{
-    """)
-    assert extract_revision_info(path) is None
+        from alembic import op
 
+        def helper():
+            op.execute("SELECT 1")
+    """)
 
-def test_missing_revision_variable_returns_none(migration_file):
-    path = migration_file("""
-        down_revision = 'def456'
+    def fail(*args, **kwargs):
+        raise AssertionError("ast.parse should not run")
 
-        def upgrade():
-            pass
-    """)
+    monkeypatch.setattr(hook.ast, "parse", fail)
     assert extract_revision_info(path) is None
 
 
-def test_annotated_assignment(migration_file):
-    path = migration_file("""
-        from typing import Sequence, Union
+@mark.parametrize(
+    "source",
+    [
+        """
+        revision = 'merge001'
+        down_revision = (
+            'abc123',
+            'def456',
+        )
+        """,
+        """
+        revision = 'merge001'  # the merge
+        down_revision = ('abc123', 'def456')  # both heads
+        """,
+        """
+        revision = 'stale'
+        revision = 'merge001'
+        down_revision = ('abc123', 'def456')
+        """,
+    ],
+    ids=["multiline_tuple", "trailing_comments", "reassigned"],
+)
+def test_unusual_formatting(migration_file, source):
+    info = extract_revision_info(migration_file(source))
+    assert info is not None
+    assert info.revision == "merge001"
+    assert info.down_revision == ("abc123", "def456")
+    assert info.is_merge is True
 
-        revision: str = 'abc123'
-        down_revision: Union[str, None] = 'def456'
-        branch_labels: Union[str, Sequence[str], None] = None
-        depends_on: Union[str, Sequence[str], None] = None
 
-        def upgrade():
-            pass
+def test_list_down_revision_is_ignored(migration_file):
+    path = migration_file("""
+        revision = 'abc123'
+        down_revision = ['def456']
     """)
     info = extract_revision_info(path)
     assert info is not None
-    assert info.revision == "abc123"
-    assert info.down_revision == "def456"
-    assert info.is_merge is False
+    assert info.down_revision is None
 
 
-def test_annotated_first_migration_down_revision_is_none(migration_file):
+def test_syntax_error_after_revision_lines_returns_none(migration_file):
     path = migration_file("""
-        from typing import Sequence, Union
-
-        revision: str = 'abc123'
-        down_revision: Union[str, None] = None
-        branch_labels: Union[str, Sequence[str], None] = None
-        depends_on: Union[str, Sequence[str], None] = None
+        revision = 'abc123'
+        down_revision = 'def456'
 
-        def upgrade():
+        def upgrade(:
             pass
     """)
-    info = extract_revision_info(path)
-    assert info is not None
-    assert info.revision == "abc123"
-    assert info.down_revision is None
-    assert info.is_merge is False
+    assert extract_revision_info(path) is None
 
 
-def test_annotated_merge_migration(migration_file):
+def test_revision_lines_inside_docstring_are_ignored(migration_file):
     path = migration_file("""
-        from typing import Sequence, Union
-
-        revision: str = 'merge001'
-        down_revision: Union[str, None] = ('abc123', 'def456')
-        branch_labels: Union[str, Sequence[str], None] = None
-        depends_on: Union[str, Sequence[str], None] = None
+        '''Helpers for migrations, used like:
 
-        def upgrade():
-            pass
+        revision = 'abc123'
+        down_revision = 'def456'
+        '''
     """)
-    info = extract_revision_info(path)
-    assert info is not None
-    assert info.revision == "merge001"
-    assert info.down_revision == ("abc123", "def456")
-    assert info.is_merge is True
+    assert extract_revision_info(path) is None
@@ -11,37 +11,51 @@ pytestmark = mark.skipif(shutil.which("squawk") is None, reason="squawk not inst
 SQL = "ALTER TABLE foo ADD COLUMN bar text;\n"
 
 
-@fixture()
-def sql_file(tmp_path):
-    path = tmp_path / "migration.sql"
-    path.write_text(SQL)
-    return path
+def squawk_project(tmp_path_factory, config=None):
+    """Write the migration SQL, and optionally a .squawk.toml, to a new directory."""
+    project = tmp_path_factory.mktemp("squawk")
+    (project / "migration.sql").write_text(SQL)
+    if config is not None:
+        (project / ".squawk.toml").write_text(config)
+    return project
 
 
-def test_without_config_flags_prefer_robust_stmts(tmp_path, sql_file):
+@fixture(scope="session")
+def unconfigured_project(tmp_path_factory):
+    return squawk_project(tmp_path_factory)
+
+
+@fixture(scope="session")
+def assume_in_transaction_project(tmp_path_factory):
+    # require-timeout-settings fires independently of assume_in_transaction,
+    # so we exclude it here to isolate the prefer-robust-stmts behavior.
+    return squawk_project(
+        tmp_path_factory,
+        'assume_in_transaction = true\nexcluded_rules = ["require-timeout-settings"]\n',
+    )
+
+
+def test_without_config_flags_prefer_robust_stmts(unconfigured_project):
     """Without assume_in_transaction, squawk flags prefer-robust-stmts."""
     result = subprocess.run(
-        ["squawk", str(sql_file)],
+        ["squawk", "migration.sql"],
         capture_output=True,
         text=True,
-        cwd=tmp_path,
+        cwd=unconfigured_project,
     )
     assert result.returncode != 0
     assert "prefer-robust-stmts" in result.stdout
 
 
-def test_with_assume_in_transaction_suppresses_prefer_robust_stmts(tmp_path, sql_file):
+def test_with_assume_in_transaction_suppresses_prefer_robust_stmts(
+    assume_in_transaction_project,
+):
     """With assume_in_transaction = true, squawk suppresses prefer-robust-stmts."""
-    # require-timeout-settings fires independently of assume_in_transaction,
-    # so we exclude it here to isolate the prefer-robust-stmts behavior.
-    (tmp_path / ".squawk.toml").write_text(
-        'assume_in_transaction = true\nexcluded_rules = ["require-timeout-settings"]\n'
-    )
     result = subprocess.run(
-        ["squawk", str(sql_file)],
+        ["squawk", "migration.sql"],
         capture_output=True,
         text=True,
-        cwd=tmp_path,
+        cwd=assume_in_transaction_project,
     )
     assert result.returncode == 0
     assert "prefer-robust-stmts" not in result.stdout